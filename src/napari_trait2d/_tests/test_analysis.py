@@ -0,0 +1,69 @@
+import numpy as np
+
+import napari_trait2d.analysis as analysis
+from napari_trait2d.common import TRAIT2DParams
+
+
+def make_tracking_data(tracks: dict, params: TRAIT2DParams) -> list:
+    # build rows as returned by workflow.run_tracking
+    tracking_data = [['X', 'Y', 'Track ID', 't']]
+    for track_id, positions in tracks.items():
+        for frame_idx, (x, y) in enumerate(positions):
+            tracking_data.append([x, y, track_id, frame_idx*params.frame_rate])
+    return tracking_data
+
+
+def naive_msd(positions: np.ndarray) -> np.ndarray:
+    return np.array([
+        np.mean(np.sum((positions[lag:] - positions[:-lag])**2, axis=1))
+        for lag in range(1, len(positions))
+    ])
+
+
+def test_compute_msd():
+    params = TRAIT2DParams()
+    rng = np.random.default_rng(0)
+    tracks = {
+        track_id: np.cumsum(rng.normal(size=(length, 2)), axis=0) + 100
+        for track_id, length in zip(range(1, 6), [1, 2, 17, 50, 333])
+    }
+    tracking_data = make_tracking_data(tracks, params)
+
+    # shuffle rows to check that the ordering of the input is irrelevant
+    rows = tracking_data[1:]
+    rng.shuffle(rows)
+    msd_data = analysis.compute_msd([tracking_data[0]] + rows, params)
+
+    np.testing.assert_allclose(msd_data["lag"], np.arange(1, 333)*params.frame_rate)
+    for track_id, positions in tracks.items():
+        np.testing.assert_allclose(msd_data["msd"][track_id], naive_msd(positions), atol=1e-8)
+
+
+def test_fit_diffusion():
+    params = TRAIT2DParams(frame_rate=1, MSD_fit_points=4)
+    rng = np.random.default_rng(1)
+    diffusion = 0.5
+
+    # brownian motion, each coordinate has a variance of 2*D*dt per step
+    tracks = {
+        track_id: np.cumsum(rng.normal(scale=np.sqrt(2*diffusion), size=(5000, 2)), axis=0)
+        for track_id in range(1, 4)
+    }
+    tracks[4] = np.zeros((2, 2))
+    tracking_data = make_tracking_data(tracks, params)
+    analysis_data = analysis.fit_diffusion(analysis.compute_msd(tracking_data, params), params)
+
+    assert analysis_data[0] == ['Track ID', 'D', 'MSD offset', 'alpha']
+    results = {row[0]: row[1:] for row in analysis_data[1:]}
+    for track_id in range(1, 4):
+        d, _, alpha = results[track_id]
+        assert abs(d - diffusion) < 0.1
+        assert abs(alpha - 1) < 0.1
+
+    # a single lag is not enough for fitting
+    assert np.all(np.isnan(results[4]))
+
+    features = analysis.track_features(tracking_data, analysis_data)
+    assert set(features) == {'D', 'MSD offset', 'alpha'}
+    assert features['D'].shape == (len(tracking_data) - 1,)
+    np.testing.assert_allclose(features['D'][:5000], results[1][0])
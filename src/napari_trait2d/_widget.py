@@ -9,6 +9,7 @@ Replace code below according to your needs.
 import json, csv
 import numpy as np
 import napari_trait2d.workflow as workflow
+import napari_trait2d.analysis as analysis
 import warnings
 from napari.layers.image.image import Image
 from napari.viewer import Viewer
@@ -143,6 +144,7 @@ class NTRAIT2D(QWidget):
                 # show or store tracks only if it has been actually found
                 # first item of tracking data is the header information so we skip it
                 if len(tracking_data) > 1:
+                    analysis_data = workflow.run_analysis(tracking_data, self.params)
                     if store:
                         filepath, _ = QFileDialog.getSaveFileName(
                             caption="Save TRAIT2D tracks",
@@ -155,6 +157,11 @@ class NTRAIT2D(QWidget):
                             with open(filepath, 'w') as csv_file:
                                 writer = csv.writer(csv_file)
                                 writer.writerows(tracking_data)
+
+                            # diffusion analysis is stored alongside the tracks
+                            with open(filepath[:-len(".csv")] + "_analysis.csv", 'w') as csv_file:
+                                writer = csv.writer(csv_file)
+                                writer.writerows(analysis_data)
                     else:
                         # we create a Track layer with the 
                         # detected coordinates;
@@ -174,7 +181,10 @@ class NTRAIT2D(QWidget):
                             data=points,
                             name=layer.name + "_tracks",
                             tail_width=3,
-                            tail_length=points.shape[0]
+                            tail_length=points.shape[0],
+                            # the diffusion analysis of each track
+                            # is attached to all of its points
+                            properties=analysis.track_features(tracking_data, analysis_data)
                         )
                 else:
                     warnings.warn("No tracks detected", RuntimeWarning)
\ No newline at end of file
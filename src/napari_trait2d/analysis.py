@@ -0,0 +1,195 @@
+import numpy as np
+from scipy.fft import rfft, irfft, next_fast_len
+from napari_trait2d.common import TRAIT2DParams
+
+# maximum number of elements of a padded batch of tracks
+# processed in a single FFT call
+BATCH_SIZE = 2 ** 22
+
+def split_tracks(tracking_data: list) -> tuple:
+    """ Rearranges the tracking output into per-track position arrays.
+
+    Args:
+        tracking_data (list): output of `workflow.run_tracking`; the first row is the header ['X', 'Y', 'Track ID', 't'].
+
+    Returns:
+        tuple: array of unique track IDs, array of starting row of each track, array of track lengths
+        and an (N, 2) array of positions sorted by track ID and time.
+    """
+    data = np.asarray(tracking_data[1:], dtype=float).reshape(-1, 4)
+
+    # sort points by track ID first and time second
+    order = np.lexsort((data[:, 3], data[:, 2]))
+    data = data[order]
+
+    track_ids, starts, lengths = np.unique(data[:, 2], return_index=True, return_counts=True)
+    return track_ids.astype(int), starts, lengths, data[:, :2]
+
+def _msd_batch(positions: np.ndarray, lengths: np.ndarray, workers: int) -> np.ndarray:
+    """ Computes the time-averaged MSD of a batch of zero-padded tracks with the FFT algorithm.
+
+    Args:
+        positions (np.ndarray): (K, L, 2) array of positions, zero-padded after each track's length.
+        lengths (np.ndarray): (K,) array with the number of valid points of each track.
+        workers (int): number of workers used by the FFT; -1 uses all available cores.
+
+    Returns:
+        np.ndarray: (K, L) array of MSD values; column m holds the MSD at lag m for m < length.
+    """
+    max_length = positions.shape[1]
+    lags = np.arange(max_length)
+    valid = lags[None, :] < lengths[:, None]
+
+    # center each track to limit the cancellation error of S1 - 2*S2
+    mean = positions.sum(axis=1) / lengths[:, None]
+    positions = np.where(valid[..., None], positions - mean[:, None, :], 0)
+
+    # S2: positional autocorrelation, computed for both coordinates at once;
+    # zero padding to at least twice the length avoids circular wrapping
+    fft_length = next_fast_len(2 * max_length, real=True)
+    spectrum = rfft(positions, n=fft_length, axis=1, workers=workers)
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).sum(axis=2)
+    autocorr = irfft(power, n=fft_length, axis=1, workers=workers)[:, :max_length]
+
+    # S1: sum of squared positions over both ends of the track,
+    # obtained from the cumulative sum for every lag
+    squared = (positions ** 2).sum(axis=2)
+    cumulative = np.zeros((positions.shape[0], max_length + 1))
+    np.cumsum(squared, axis=1, out=cumulative[:, 1:])
+    total = cumulative[np.arange(positions.shape[0]), lengths]
+    head = np.take_along_axis(cumulative, np.clip(lengths[:, None] - lags[None, :], 0, None), axis=1)
+    tail = total[:, None] - cumulative[:, :max_length]
+
+    counts = np.where(valid, lengths[:, None] - lags[None, :], 1)
+    msd = (head + tail - 2 * autocorr) / counts
+    return np.where(valid, np.maximum(msd, 0), np.nan)
+
+def compute_msd(tracking_data: list, params: TRAIT2DParams, workers: int = -1) -> dict:
+    """ Calculates the time-averaged mean squared displacement of every track for all lags.
+
+    Tracks are grouped by FFT length and processed as zero-padded batches,
+    so that each group is handled by a single vectorized FFT call distributed over `workers`.
+    Positions are expected to be already scaled by `params.resolution`, as returned by `workflow.run_tracking`.
+
+    Args:
+        tracking_data (list): output of `workflow.run_tracking`.
+        params (TRAIT2DParams): parameters used for the tracking.
+        workers (int, optional): number of workers used by the FFT; -1 uses all available cores. Defaults to -1.
+
+    Returns:
+        dict: lag times, shared by all tracks, under the "lag" key and a dictionary of
+        track ID : MSD array (lags 1 to track length - 1) under the "msd" key.
+    """
+    track_ids, starts, lengths, positions = split_tracks(tracking_data)
+    msd = {}
+
+    if track_ids.size > 0:
+        # group tracks with the same FFT length and split each group
+        # into batches of bounded size to limit memory usage
+        order = np.argsort(lengths, kind="stable")
+        unique_lengths, inverse = np.unique(lengths[order], return_inverse=True)
+        fft_lengths = np.array([next_fast_len(2 * int(length), real=True) for length in unique_lengths])[inverse]
+        for fft_length in np.unique(fft_lengths):
+            group = order[fft_lengths == fft_length]
+            batch_size = max(1, BATCH_SIZE // int(fft_length))
+            for batch_start in range(0, group.size, batch_size):
+                batch = group[batch_start:batch_start + batch_size]
+                batch_lengths = lengths[batch]
+                max_length = int(batch_lengths.max())
+
+                # build the zero-padded position array of the batch
+                padded = np.zeros((batch.size, max_length, 2))
+                rows = starts[batch][:, None] + np.arange(max_length)[None, :]
+                valid = np.arange(max_length)[None, :] < batch_lengths[:, None]
+                padded[valid] = positions[rows[valid]]
+
+                batch_msd = _msd_batch(padded, batch_lengths, workers)
+                for idx, track_idx in enumerate(batch):
+                    msd[int(track_ids[track_idx])] = batch_msd[idx, 1:lengths[track_idx]]
+
+    max_lag = int(lengths.max()) if lengths.size > 0 else 1
+    return {
+        "lag": np.arange(1, max_lag) * params.frame_rate,
+        "msd": msd,
+    }
+
+def fit_diffusion(msd_data: dict, params: TRAIT2DParams) -> list:
+    """ Fits the diffusion models of every track in a single batch.
+
+    The Brownian model MSD = 4*D*t + offset and the anomalous model MSD = 4*D*t^alpha
+    are fitted by least squares on the first `params.MSD_fit_points` lags of each track.
+    Tracks with less than two available lags are assigned NaN values.
+
+    Args:
+        msd_data (dict): output of `compute_msd`.
+        params (TRAIT2DParams): parameters used for the tracking.
+
+    Returns:
+        list: rows of the analysis data; first element is the header ['Track ID', 'D', 'MSD offset', 'alpha'].
+    """
+    analysis_data = [['Track ID', 'D', 'MSD offset', 'alpha']]
+    track_ids = list(msd_data["msd"].keys())
+    if not track_ids:
+        return analysis_data
+
+    n_points = max(2, params.MSD_fit_points)
+    lag = msd_data["lag"][:n_points]
+    values = np.full((len(track_ids), lag.size), np.nan)
+    for idx, track_id in enumerate(track_ids):
+        curve = msd_data["msd"][track_id][:lag.size]
+        values[idx, :curve.size] = curve
+
+    def linear_fit(x: np.ndarray, y: np.ndarray, weight: np.ndarray) -> tuple:
+        # closed-form least squares of y = slope*x + intercept for each row
+        sw = weight.sum(axis=1)
+        sx = (weight * x).sum(axis=1)
+        sy = (weight * y).sum(axis=1)
+        sxx = (weight * x * x).sum(axis=1)
+        sxy = (weight * x * y).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            det = sw * sxx - sx ** 2
+            slope = np.where(sw >= 2, (sw * sxy - sx * sy) / det, np.nan)
+            intercept = np.where(sw >= 2, (sy - slope * sx) / sw, np.nan)
+        return slope, intercept
+
+    lag = np.broadcast_to(lag, values.shape)
+
+    # Brownian diffusion
+    weight = np.isfinite(values).astype(float)
+    slope, offset = linear_fit(lag, np.nan_to_num(values), weight)
+    diffusion = slope / 4
+
+    # anomalous diffusion on the log-log scale, zero MSD values are discarded
+    positive = weight * (np.nan_to_num(values) > 0)
+    with np.errstate(divide="ignore"):
+        log_values = np.where(positive > 0, np.log(np.where(positive > 0, values, 1)), 0)
+    alpha, _ = linear_fit(np.log(lag), log_values, positive)
+
+    for track_id, d, o, a in zip(track_ids, diffusion, offset, alpha):
+        analysis_data.append([track_id, d, o, a])
+    return analysis_data
+
+def track_features(tracking_data: list, analysis_data: list) -> dict:
+    """ Maps the analysis results onto each point of the tracking output,
+    so that they can be attached as features to a napari Tracks layer.
+
+    Args:
+        tracking_data (list): output of `workflow.run_tracking`.
+        analysis_data (list): output of `fit_diffusion`.
+
+    Returns:
+        dict: name : (N,) array for each analysis column, following the row order of `tracking_data`.
+    """
+    header, rows = analysis_data[0], analysis_data[1:]
+    point_ids = np.asarray([data[2] for data in tracking_data[1:]], dtype=int)
+    results = np.asarray(rows, dtype=float).reshape(-1, len(header))
+    analysis_ids = results[:, 0].astype(int)
+
+    # look up the analysis row of each point by track ID
+    order = np.argsort(analysis_ids)
+    position = order[np.searchsorted(analysis_ids, point_ids, sorter=order)]
+    return {
+        name: results[position, column_idx]
+        for column_idx, name in enumerate(header)
+        if name != 'Track ID'
+    }
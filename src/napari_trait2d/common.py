@@ -30,6 +30,7 @@ class TRAIT2DParams:
     frame_rate: int = 100
     start_frame: int = 0
     end_frame: int = 100
+    MSD_fit_points: int = 4
     spot_type: SpotEnum = SpotEnum.DARK
 
 ParamType = Union[int, float, SpotEnum]
\ No newline at end of file
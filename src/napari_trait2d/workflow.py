@@ -1,6 +1,7 @@
 import numpy as np
 import napari_trait2d.detection as detection
 import napari_trait2d.tracking as tracking
+import napari_trait2d.analysis as analysis
 from skimage.util import invert, img_as_ubyte
 from napari_trait2d.common import (
     TRAIT2DParams,
@@ -94,4 +95,12 @@ def run_tracking(video: np.ndarray, params: TRAIT2DParams) -> list:
             new_frame_trace.clear()
             new_trace.clear()
     
-    return tracking_data
\ No newline at end of file
+    return tracking_data
+
+def run_analysis(tracking_data: list, params: TRAIT2DParams) -> list:
+    
+    # compute the MSD curves of all tracks
+    # and fit the diffusion models on them;
+    # first element of the list is a list of header names
+    msd_data = analysis.compute_msd(tracking_data, params)
+    return analysis.fit_diffusion(msd_data, params)
\ No newline at end of file